@@ -1,58 +1,68 @@
-from typing import Dict, List, Optional
+from typing import Annotated, Dict, List, Optional
 from enum import IntEnum
-from pydantic import BaseModel, Field, HttpUrl
-from aiohttp import ClientSession, ClientTimeout
+import msgspec
+from msgspec import Meta, Struct
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
 import asyncio
+import orjson
 from datetime import timedelta
 
+__all__ = [
+    'ElementusClient',
+    'ElementusAPIError',
+    'OFACSanctionStatus',
+    'AttributionData',
+    'AddressAttributionsRequest',
+    'AddressAttributionsResponse',
+]
+
 class OFACSanctionStatus(IntEnum):
     """Enum representing OFAC sanction status"""
     NOT_SANCTIONED = 0
     SANCTIONED = 1
 
-class AttributionData(BaseModel):
+class AttributionData(Struct, omit_defaults=True):
     """Data model for wallet attribution information"""
-    beneficial_owner: Optional[str] = Field(
-        None, 
-        description='The ultimate beneficial owner of the wallet'
-    )
-    custodian: Optional[str] = Field(
-        None, 
-        description='The custodian service holding the assets, if applicable'
-    )
-    entity: Optional[str] = Field(
-        None, 
-        description='The entity name associated with this wallet'
-    )
-    is_ofac_sanctioned: Optional[OFACSanctionStatus] = Field(
-        None,
-        description='Flag indicating if the entity is OFAC sanctioned'
-    )
-    sdn_name: Optional[str] = Field(
-        None, 
-        description='The Specially Designated Nationals (SDN) name if sanctioned'
-    )
-    wallet_id: Optional[str] = Field(
-        None, 
-        description='The wallet address'
-    )
-
-class AddressAttributionsRequest(BaseModel):
+    beneficial_owner: Annotated[
+        Optional[str],
+        Meta(description='The ultimate beneficial owner of the wallet')
+    ] = None
+    custodian: Annotated[
+        Optional[str],
+        Meta(description='The custodian service holding the assets, if applicable')
+    ] = None
+    entity: Annotated[
+        Optional[str],
+        Meta(description='The entity name associated with this wallet')
+    ] = None
+    is_ofac_sanctioned: Annotated[
+        Optional[OFACSanctionStatus],
+        Meta(description='Flag indicating if the entity is OFAC sanctioned')
+    ] = None
+    sdn_name: Annotated[
+        Optional[str],
+        Meta(description='The Specially Designated Nationals (SDN) name if sanctioned')
+    ] = None
+    wallet_id: Annotated[
+        Optional[str],
+        Meta(description='The wallet address')
+    ] = None
+
+class AddressAttributionsRequest(Struct):
     """Request model for address attributions"""
-    addresses: List[str] = Field(
-        ...,
-        description='List of addresses to get attributions for',
-        min_items=1,
-        max_items=10000,  # Adding a reasonable limit
-        example=['1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa']
-    )
-
-class AddressAttributionsResponse(BaseModel):
+    addresses: Annotated[
+        List[str],
+        Meta(
+            description='List of addresses to get attributions for',
+            min_length=1,
+            max_length=10000,  # Adding a reasonable limit
+            examples=[['1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa']]
+        )
+    ]
+
+class AddressAttributionsResponse(Struct):
     """Response model for address attributions"""
-    data: Dict[str, AttributionData] = Field(
-        default_factory=dict,
-        description='Map of addresses to their attribution data'
-    )
+    data: Dict[str, AttributionData] = msgspec.field(default_factory=dict)
 
 class ElementusAPIError(Exception):
     """Custom exception for Elementus API errors"""
@@ -87,9 +97,18 @@ class ElementusClient:
         self._session: Optional[ClientSession] = None
 
     async def _get_session(self) -> ClientSession:
-        """Get or create an aiohttp ClientSession."""
+        """Get or create the shared aiohttp ClientSession.
+
+        The session is created lazily and kept open for the lifetime of the
+        client so that requests reuse pooled keep-alive connections instead
+        of paying a TCP+TLS handshake per call.
+        """
         if self._session is None or self._session.closed:
-            self._session = ClientSession(timeout=self.timeout)
+            self._session = ClientSession(
+                timeout=self.timeout,
+                headers=self.headers,
+                connector=TCPConnector(limit=100, keepalive_timeout=30)
+            )
         return self._session
 
     async def close(self) -> None:
@@ -102,7 +121,7 @@ class ElementusClient:
         method: str, 
         endpoint: str, 
         **kwargs
-    ) -> Dict:
+    ) -> bytes:
         """
         Make an HTTP request to the API.
 
@@ -112,23 +131,23 @@ class ElementusClient:
             **kwargs: Additional arguments to pass to aiohttp
 
         Returns:
-            Dict containing the response data
+            Raw response body bytes
 
         Raises:
             ElementusAPIError: If the API returns an error response
         """
         url = f"{self.base_url}{endpoint}"
         session = await self._get_session()
-        
-        async with session.request(method, url, headers=self.headers, **kwargs) as response:
+
+        async with session.request(method, url, **kwargs) as response:
             if response.status >= 400:
                 try:
-                    error_data = await response.json()
+                    error_data = await response.json(loads=orjson.loads)
                 except ValueError:
                     error_data = {"message": await response.text()}
                 raise ElementusAPIError(response.status, error_data)
-                
-            return await response.json()
+
+            return await response.read()
 
     async def get_address_attributions(
         self, 
@@ -145,17 +164,49 @@ class ElementusClient:
 
         Raises:
             ElementusAPIError: If the API request fails
-            ValidationError: If the input or output validation fails
+            msgspec.ValidationError: If the output validation fails
         """
-        request = AddressAttributionsRequest(addresses=addresses)
-        
-        response_data = await self._make_request(
+        # The payload is just {"addresses": [...]}; skip per-address request
+        # validation and rely on server-side rejection of bad input. Encode
+        # with orjson and pass the bytes directly rather than letting aiohttp
+        # run the payload through stdlib json.dumps (the session's default
+        # Content-Type header already declares application/json).
+        body = await self._make_request(
             "POST",
             "/address-attributions",
-            json=request.model_dump()
+            data=orjson.dumps({"addresses": list(addresses)})
         )
-        
-        return AddressAttributionsResponse.model_validate(response_data)
+
+        return msgspec.json.decode(body, type=AddressAttributionsResponse)
+
+    async def get_address_attributions_chunked(
+        self,
+        addresses: List[str],
+        chunk_size: int = 1000
+    ) -> AddressAttributionsResponse:
+        """
+        Get attribution data for an arbitrarily long list of addresses.
+
+        Splits the list into chunks that fit the API's per-request cap and
+        issues the chunk requests concurrently over the pooled session.
+
+        Args:
+            addresses: List of blockchain addresses to get attributions for
+            chunk_size: Maximum number of addresses per API request
+
+        Returns:
+            AddressAttributionsResponse with the merged attribution data
+
+        Raises:
+            ElementusAPIError: If any chunk request fails
+        """
+        chunks = [addresses[i:i + chunk_size] for i in range(0, len(addresses), chunk_size)]
+        responses = await asyncio.gather(*[self.get_address_attributions(chunk) for chunk in chunks])
+
+        merged = AddressAttributionsResponse()
+        for response in responses:
+            merged.data.update(response.data)
+        return merged
 
     async def check_health(self) -> bool:
         """
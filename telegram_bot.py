@@ -1,8 +1,11 @@
 import asyncio
 import json
 import logging
+import os
+import signal
+import orjson
 from typing import List, Dict, Optional
-from openai import OpenAI
+from openai import AsyncOpenAI
 # Import your Elementus code
 # Make sure elementus.py is in the same directory or installed as a package
 from elementus import ElementusClient, ElementusAPIError
@@ -68,25 +71,79 @@ JSON content
 
 """
 
+import uvloop
 import websockets
-from telegram import Bot
+import aiohttp
 from aiohttp import ClientSession, ClientTimeout
+from collections import OrderedDict
+
+class AttributionCache:
+    """Bounded LRU cache of address -> entity attributions.
+
+    Hot addresses (exchanges, mining pools) recur in nearly every block;
+    caching their attributions avoids re-querying Elementus per block.
+    No locking needed: everything runs on the single event-loop thread.
+    """
+
+    # Sentinel for addresses queried before but unknown to the API, so they
+    # are not re-queried while staying absent from the attribution map.
+    _ABSENT = object()
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+
+    def get_many(self, addresses):
+        """Split addresses into cached attributions and cache misses."""
+        hits = {}
+        misses = []
+        entries = self._entries
+        for addr in addresses:
+            if addr in entries:
+                entries.move_to_end(addr)
+                value = entries[addr]
+                if value is not self._ABSENT:
+                    hits[addr] = value
+            else:
+                misses.append(addr)
+        return hits, misses
+
+    def put_many(self, queried: List[str], attributions: Dict[str, Optional[str]]):
+        """Record fetched attributions for the queried addresses, evicting LRU entries."""
+        entries = self._entries
+        for addr in queried:
+            entries[addr] = attributions.get(addr, self._ABSENT)
+            entries.move_to_end(addr)
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
 
 class WebSocketTelegramBridge:
     def __init__(self, telegram_token: str, telegram_channel_id: str, websocket_url: str):
         """Initialize the bridge with necessary credentials and configuration."""
-        self.openai = OpenAI(api_key=OPENAI_API_KEY)
+        self.openai = AsyncOpenAI(api_key=OPENAI_API_KEY)
         self.telegram_token = telegram_token
         self.channel_id = telegram_channel_id
         self.websocket_url = websocket_url
-        self.bot: Optional[Bot] = None
+        self._http: Optional[ClientSession] = None
+        self._sem = asyncio.Semaphore(4)
+        self._tasks: set = set()
+        self._attr_cache = AttributionCache()
+        self._llm_q: asyncio.Queue = asyncio.Queue(maxsize=8)
+        self._stop = asyncio.Event()
         # Configure logging
         logging.basicConfig(
-            level=logging.DEBUG,
+            level=os.getenv('LOG_LEVEL', 'INFO'),
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
         self.logger = logging.getLogger(__name__)
 
+    async def setup_http(self):
+        """Create the shared HTTP session for blockchain.info and Telegram calls."""
+        self._http = ClientSession(
+            timeout=ClientTimeout(total=10),
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=75)
+        )
+
     async def setup_elementus_client(self):
         """Initialize the Elementus client."""
         self.elementus_client = ElementusClient(api_key=ELEMENTUS_API_KEY)
@@ -95,104 +152,163 @@ class WebSocketTelegramBridge:
             if not result:
                 raise Exception("Elementus client is not healthy!")
         except Exception as e:
-            self.logger.error(f"Failed to initialize Elementus client: {str(e)}")    
-        finally:
-            await self.elementus_client.close()
+            self.logger.error(f"Failed to initialize Elementus client: {str(e)}")
 
     async def get_tx_attributions(self, transactions: List[Dict]):
         """Get address attributions from Elementus."""
+        sats_to_btc = 1 / 100_000_000
         addresses = set()
-        txs = []
+        stripped = []
         for tx in transactions:
-            tx_stripped = {
-                'hash': tx['hash'],
-                'inputs': [inp.get('prev_out', {}).get('addr') for inp in tx.get('inputs', [])],
-                'outputs': {out.get('addr'): {'value': out.get('value', 0) / 100_000_000} for out in tx.get('out', [])}
-            }
-            if any(out['value'] > THRESHOLD for out in tx_stripped['outputs'].values()):
-                txs.append(tx_stripped)
-                addresses.update(tx_stripped['inputs'])
-                addresses.update(tx_stripped['outputs'].keys())
-
-        addresses = list(filter(None, addresses))
-        ret = {}
+            # Outputs as (addr, value) tuples: one small allocation per output.
+            # Track the max value while walking so below-threshold txs (the
+            # vast majority) are skipped without a second pass or any further
+            # allocation.
+            max_value = 0.0
+            outputs = []
+            for out in tx.get('out', ()):
+                value = out.get('value', 0) * sats_to_btc
+                if value > max_value:
+                    max_value = value
+                outputs.append((out.get('addr'), value))
+            if max_value <= THRESHOLD:
+                continue
+            inputs = [inp.get('prev_out', {}).get('addr') for inp in tx.get('inputs', ())]
+            stripped.append((tx['hash'], inputs, outputs))
+            addresses.update(addr for addr in inputs if addr)
+            addresses.update(addr for addr, _ in outputs if addr)
+
+        attributions, misses = self._attr_cache.get_many(addresses)
         try:
-            result = await self.elementus_client.get_address_attributions(addresses)
-            # Convert Pydantic model to dict for JSON serialization
-            attributions = {addr: data.get('entity') for addr, data in result.model_dump()['data'].items()}
+            if misses:
+                result = await self.elementus_client.get_address_attributions_chunked(misses)
+                fetched = {addr: data.entity for addr, data in result.data.items()}
+                self._attr_cache.put_many(misses, fetched)
+                attributions.update(fetched)
 
-            for tx in txs:
-                for addr in tx['inputs']:
+            txs = []
+            attr_get = attributions.get
+            for tx_hash, inputs, outputs in stripped:
+                tx = {'hash': tx_hash, 'outputs': {}}
+                # O(1) membership checks in the output loop (coinjoin-style
+                # txs can have hundreds of inputs)
+                input_set = set(inputs)
+                for addr in inputs:
                     if addr in attributions:
                         tx['input_entity'] = attributions[addr]
                         break
-                for addr, output in tx['outputs'].items():
-                    if output['value'] < THRESHOLD or addr in tx['inputs']:
+                for addr, value in outputs:
+                    output = {'value': value}
+                    tx['outputs'][addr] = output
+                    if value < THRESHOLD or addr in input_set:
                         continue
                     if addr in attributions:
-                        if attributions[addr] == tx.get('input_entity', None):
+                        entity = attr_get(addr)
+                        if entity == tx.get('input_entity', None):
                             continue
-                        output['entity'] = attributions[addr]
-                tx.pop('inputs')
+                        output['entity'] = entity
+                txs.append(tx)
             return txs
 
         except Exception as e:
             self.logger.error(f"Failed to get address attributions: {str(e)}")
             return None
 
-    async def setup_telegram_bot(self):
-        """Initialize the Telegram bot."""
-        self.bot = Bot(token=self.telegram_token)
-
     async def send_to_telegram(self, message: str):
         """Send a message to the configured Telegram channel using Markdown formatting."""
         try:
-            await self.bot.send_message(
-                chat_id=self.channel_id,
-                text=message,
-                parse_mode='Markdown'
-            )
-            self.logger.info(f"Message sent to Telegram: {message[:50]}...")
+            async with self._http.post(
+                f"https://api.telegram.org/bot{self.telegram_token}/sendMessage",
+                json={
+                    "chat_id": self.channel_id,
+                    "text": message,
+                    "parse_mode": "Markdown"
+                }
+            ) as response:
+                if response.status != 200:
+                    raise Exception(f"Telegram API returned status {response.status}: {await response.text()}")
+            self.logger.info("Message sent to Telegram: %.50s...", message)
         except Exception as e:
             self.logger.error(f"Failed to send message to Telegram: {str(e)}")
 
+    async def fetch_block_txs(self, block_hash: str) -> List[Dict]:
+        """Fetch a block's transactions from blockchain.info, retrying while the block is not yet indexed."""
+        for attempt in range(4):
+            async with self._http.get(f"https://blockchain.info/rawblock/{block_hash}") as response:
+                if response.status == 200:
+                    # Return only the tx list so the raw bytes and the rest of
+                    # the multi-MB block dict are freed before attribution runs
+                    # (matters with several blocks in flight).
+                    return orjson.loads(await response.read())['tx']
+                if response.status == 404:
+                    # Block not indexed yet; back off and retry
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                    continue
+                raise Exception(f"Failed to process block data! Status: {response.status}")
+        raise Exception(f"Block {block_hash} not available after retries")
+
     async def process_websocket_message(self, message: str):
-        """Process incoming WebSocket message and prepare it for Telegram using Markdown formatting."""
+        """Parse an incoming block, attribute its transactions and queue it for the LLM workers."""
         try:
-            attributions = []
             # Parse the message
-            block_data = json.loads(message)
+            block_data = orjson.loads(message)
             # Retrieve full block data
             block_hash = block_data.get('x', {}).get('hash')
-            if block_hash:
-                async with ClientSession(timeout=ClientTimeout(total=10)) as session:
-                    await asyncio.sleep(5)
-                    async with session.get(f"https://blockchain.info/rawblock/{block_hash}") as response:
-                        if response.status == 200:
-                            full_block_data = await response.json()
-                            # Process full_block_data as needed
-                            attributions = await self.get_tx_attributions(full_block_data['tx'])
-                            completion = self.openai.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": OPENAI_PROMPT + '\n' + json.dumps(attributions)},], temperature=0)
-                        else:
-                            raise Exception(f"Failed to process block data! Status: {response.status}")
-            else:
+            if not block_hash:
                 raise Exception("Block hash not found in the message!")
-            
-            # Format the message for Telegram using Markdown
-            formatted_message = (   
-                f"*Block Height:* {block_data.get('x', {}).get('height', 'N/A')}\n"
-                f"*Number of Transactions:* {block_data.get('x', {}).get('nTx', 'N/A')}\n"
-                f"\n{completion.choices[0].message.content}\n"
-            )
-            # Escape special characters for MarkdownV2
-            #formatted_message = formatted_message.replace('.', '\\.').replace('-', '\\-').replace('_', '\\_').replace('!', '\\!').replace('(', '\\(').replace(')', '\\)').replace('[', '\\[').replace(']', '\\]')
-            
-            await self.send_to_telegram(formatted_message)
-        except json.JSONDecodeError:
+            txs = await self.fetch_block_txs(block_hash)
+            attributions = await self.get_tx_attributions(txs)
+            # Hand off to the LLM workers; the bounded queue provides
+            # backpressure when generation falls behind fetching.
+            await self._llm_q.put((block_data, attributions))
+        except orjson.JSONDecodeError:
             self.logger.error("Failed to parse WebSocket message as JSON")
         except Exception as e:
             self.logger.error(f"Error processing message: {str(e)}")
 
+    async def _llm_worker(self):
+        """Consume attributed blocks, generate insights and publish them to Telegram."""
+        while True:
+            block_data, attributions = await self._llm_q.get()
+            try:
+                stream = await self.openai.chat.completions.create(
+                    model="gpt-4o",
+                    # Static prompt as a system message: no per-block prompt
+                    # concatenation, and the constant prefix is cacheable
+                    # server-side for prompt-caching pricing.
+                    messages=[
+                        {"role": "system", "content": OPENAI_PROMPT},
+                        {"role": "user", "content": orjson.dumps(attributions).decode()}
+                    ],
+                    temperature=0,
+                    stream=True
+                )
+                chunks = []
+                async for event in stream:
+                    if event.choices:
+                        chunks.append(event.choices[0].delta.content or "")
+                insights = "".join(chunks)
+
+                # Format the message for Telegram using Markdown
+                formatted_message = (
+                    f"*Block Height:* {block_data.get('x', {}).get('height', 'N/A')}\n"
+                    f"*Number of Transactions:* {block_data.get('x', {}).get('nTx', 'N/A')}\n"
+                    f"\n{insights}\n"
+                )
+                # Escape special characters for MarkdownV2
+                #formatted_message = formatted_message.replace('.', '\\.').replace('-', '\\-').replace('_', '\\_').replace('!', '\\!').replace('(', '\\(').replace(')', '\\)').replace('[', '\\[').replace(']', '\\]')
+
+                await self.send_to_telegram(formatted_message)
+            except Exception as e:
+                self.logger.error(f"Error publishing block insights: {str(e)}")
+            finally:
+                self._llm_q.task_done()
+
+    async def _bounded_process(self, message: str):
+        """Process a message under the concurrency semaphore."""
+        async with self._sem:
+            await self.process_websocket_message(message)
+
     async def websocket_listener(self):
         """Main WebSocket connection handler."""
         while True:
@@ -209,8 +325,10 @@ class WebSocketTelegramBridge:
                     
                     while True:
                         message = await websocket.recv()
-                        self.logger.debug(f"Received message: {message[:50]}...")
-                        await self.process_websocket_message(message)
+                        self.logger.debug("Received message: %.50s...", message)
+                        # Process in the background so bursts of blocks overlap
+                        # instead of queueing behind one another.
+                        self._spawn(self._bounded_process(message))
                         
             except websockets.exceptions.ConnectionClosed:
                 self.logger.warning("WebSocket connection closed, attempting to reconnect...")
@@ -219,11 +337,39 @@ class WebSocketTelegramBridge:
                 self.logger.error(f"WebSocket error: {str(e)}")
                 await asyncio.sleep(5)  # Wait before reconnecting
 
+    async def shutdown(self):
+        """Stop the bridge: cancel running tasks, then close long-lived clients."""
+        self.logger.info("Shutting down...")
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.elementus_client.close()
+        if self._http and not self._http.closed:
+            await self._http.close()
+
+    def _spawn(self, coro):
+        """Run a coroutine as a tracked background task."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
     async def run(self):
-        """Start the bridge."""
-        await self.setup_telegram_bot()
+        """Start the bridge and block until a stop signal arrives."""
+        loop = asyncio.get_running_loop()
+        # Signals only set the stop event; setting it twice is a no-op, so a
+        # second Ctrl-C cannot trigger a double-close mid-shutdown.
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self._stop.set)
+        await self.setup_http()
         await self.setup_elementus_client()
-        await self.websocket_listener()
+        # LLM workers overlap generation for one block with fetching and
+        # attributing the next.
+        for _ in range(2):
+            self._spawn(self._llm_worker())
+        self._spawn(self.websocket_listener())
+        await self._stop.wait()
+        await self.shutdown()
 
 def main():
     # Configuration - replace with your actual values
@@ -236,7 +382,8 @@ def main():
         websocket_url=WEBSOCKET_URL
     )
 
-    # Run the async event loop
+    # Run the async event loop on uvloop for lower per-callback overhead
+    uvloop.install()
     asyncio.run(bridge.run())
 
 if __name__ == "__main__":